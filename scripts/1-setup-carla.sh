@@ -142,11 +142,30 @@ check_binaries() {
   fi
 }
 
+# manual_control_wheel_extended.py imports manual_control_steeringwheel.py as a
+# module, so its bytecode is cached in __pycache__; compile it now so the first
+# wheel launch does not pay for parsing it.
+precompile_wheel_example() {
+  local base_script="$INSTALL_DIR/PythonAPI/examples/manual_control_steeringwheel.py"
+  [ -f "$base_script" ] || return 0
+  if [ -n "${PYTHONDONTWRITEBYTECODE:-}" ]; then
+    return 0
+  fi
+  local py
+  for py in python3.7 python37 python3; do
+    if command -v "$py" >/dev/null 2>&1; then
+      "$py" -m py_compile "$base_script" 2>/dev/null || log "Could not precompile $(basename "$base_script") with $py"
+      return 0
+    fi
+  done
+}
+
 main() {
   log "Step 1: Setting up CARLA $CARLA_VERSION in $INSTALL_DIR"
   ensure_tarball_valid
   unpack_tarball
   check_binaries
+  precompile_wheel_example
   log "Setup complete! Next step: run scripts/2-start-carla.sh to start CARLA"
 }
 
@@ -16,31 +16,47 @@ The helper connects to a running CARLA simulator (any CARLA 0.9.x server).
 from __future__ import annotations
 
 import argparse
+import filecmp
+import functools
 import os
 import random
+import re
+import shutil
 import subprocess
 import sys
 import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 DEFAULT_ROLE_NAME = "hero"
-CARLA_ROOT = Path(__file__).resolve().parents[1] / "local_carla"
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CARLA_ROOT = PROJECT_ROOT / "local_carla"
 PY_API_DIST = CARLA_ROOT / "PythonAPI" / "carla" / "dist"
 PY_API_SOURCE = CARLA_ROOT / "PythonAPI" / "carla"
 EXAMPLES_DIR = CARLA_ROOT / "PythonAPI" / "examples"
-PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_WHEEL_TEMPLATE = PROJECT_ROOT / "scripts" / "wheel-config-g29.ini"
 WHEEL_WRAPPER = PROJECT_ROOT / "scripts" / "manual_control_wheel_extended.py"
 
 
+def _egg_version_key(egg_path: Path) -> Tuple[int, ...]:
+    """Numeric sort key so carla-0.9.10 ranks above carla-0.9.9.
+
+    Only the release number counts, not the python tag or platform suffix.
+    """
+    match = re.match(r"carla-(\d+(?:\.\d+)*)", egg_path.name)
+    return tuple(int(part) for part in match.group(1).split(".")) if match else ()
+
+
+@functools.lru_cache(maxsize=None)
 def find_carla_egg() -> Optional[Path]:
-    """Find the CARLA egg file in the distribution directory."""
+    """Find the CARLA egg file in the distribution directory.
+
+    Cached: the startup checks and run_manual_control all need the same egg.
+    """
     if not CARLA_ROOT.exists():
         return None
-    eggs = sorted(PY_API_DIST.glob("carla-*.egg"))
-    return eggs[-1] if eggs else None
+    return max(PY_API_DIST.glob("carla-*.egg"), key=_egg_version_key, default=None)
 
 
 def extract_required_python_version(egg_path: Path) -> Optional[str]:
@@ -48,14 +64,12 @@ def extract_required_python_version(egg_path: Path) -> Optional[str]:
 
     Example: carla-0.9.15-py3.7-linux-x86_64.egg -> 3.7
     """
-    import re
     match = re.search(r'-py(\d+\.\d+)-', egg_path.name)
     return match.group(1) if match else None
 
 
 def find_compatible_python(required_version: str) -> Optional[str]:
     """Find a Python executable that matches the required version."""
-    import shutil
     candidates = [
         f"python{required_version}",
         f"python{required_version.replace('.', '')}",
@@ -111,11 +125,11 @@ def ensure_carla_on_path() -> None:
     if not CARLA_ROOT.exists():
         print("[helper] local_carla directory is missing; run scripts/1-setup-carla.sh first", file=sys.stderr)
         sys.exit(2)
-    eggs = sorted(PY_API_DIST.glob("carla-*.egg"))
-    if not eggs:
+    egg_path = find_carla_egg()
+    if egg_path is None:
         print(f"[helper] No CARLA egg found under {PY_API_DIST}", file=sys.stderr)
         sys.exit(2)
-    sys.path.append(str(eggs[-1]))
+    sys.path.append(str(egg_path))
     sys.path.append(str(PY_API_SOURCE))
 
 
@@ -129,24 +143,49 @@ except ModuleNotFoundError as exc:  # pragma: no cover
     sys.exit(2)
 
 
-WEATHER_PRESETS = {
-    "ClearNoon": carla.WeatherParameters.ClearNoon,
-    "ClearSunset": carla.WeatherParameters.ClearSunset,
-    "CloudyNoon": carla.WeatherParameters.CloudyNoon,
-    "CloudySunset": carla.WeatherParameters.CloudySunset,
-    "WetNoon": carla.WeatherParameters.WetNoon,
-    "WetSunset": carla.WeatherParameters.WetSunset,
-    "MidRainyNoon": carla.WeatherParameters.MidRainyNoon,
-    "MidRainSunset": carla.WeatherParameters.MidRainSunset,
-    "HardRainNoon": carla.WeatherParameters.HardRainNoon,
-    "HardRainSunset": carla.WeatherParameters.HardRainSunset,
-    "SoftRainNoon": carla.WeatherParameters.SoftRainNoon,
-    "SoftRainSunset": carla.WeatherParameters.SoftRainSunset,
-}
+WEATHER_NAMES = (
+    "ClearNoon",
+    "ClearSunset",
+    "CloudyNoon",
+    "CloudySunset",
+    "WetNoon",
+    "WetSunset",
+    "MidRainyNoon",
+    "MidRainSunset",
+    "HardRainNoon",
+    "HardRainSunset",
+    "SoftRainNoon",
+    "SoftRainSunset",
+)
+WEATHER_CHOICES = tuple(sorted(WEATHER_NAMES))
+
+
+@functools.lru_cache(maxsize=None)
+def weather_presets() -> Dict[str, carla.WeatherParameters]:
+    """Map preset names to carla.WeatherParameters, built on first use."""
+    return {name: getattr(carla.WeatherParameters, name) for name in WEATHER_NAMES}
 
 
 VIEW_CHOICES = ["chase", "front", "top", "free"]
 
+# Spectator placement per view: (offset from hero, pitch, yaw delta)
+VIEW_OFFSETS = {
+    "chase": (carla.Location(x=-8, z=3), -10, 0),
+    "front": (carla.Location(x=8, z=2), -5, 180),
+    "top": (carla.Location(z=40), -90, 0),
+}
+
+
+def rgb_color(value: str) -> str:
+    """argparse type for R,G,B colors; returns the normalized "R,G,B" string."""
+    try:
+        channels = [int(part) for part in value.split(",")]
+    except ValueError:
+        channels = []
+    if len(channels) != 3 or not all(0 <= c <= 255 for c in channels):
+        raise argparse.ArgumentTypeError(f"expected R,G,B with values 0-255, got '{value}'")
+    return ",".join(str(c) for c in channels)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -165,11 +204,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--vehicle-filter", default="vehicle.*", help="Blueprint filter when listing/spawning")
 
     parser.add_argument("--spawn", metavar="BLUEPRINT", help="Spawn/replace hero vehicle with blueprint id")
-    parser.add_argument("--spawn-color", metavar="R,G,B", help="Set vehicle color (if supported)")
+    parser.add_argument("--spawn-color", metavar="R,G,B", type=rgb_color, help="Set vehicle color (if supported)")
     parser.add_argument("--respawn-hero", action="store_true", help="Remove existing hero before applying other actions")
     parser.add_argument("--autopilot", choices=["on", "off"], help="Toggle autopilot on hero vehicle")
 
-    parser.add_argument("--weather", choices=sorted(WEATHER_PRESETS.keys()), help="Apply a predefined weather preset")
+    parser.add_argument("--weather", choices=WEATHER_CHOICES, help="Apply a predefined weather preset")
     parser.add_argument("--view", choices=VIEW_CHOICES, help="Move spectator to a common viewpoint")
     parser.add_argument("--manual", action="store_true", help="Launch PythonAPI/examples/manual_control.py")
     parser.add_argument("--manual-wheel", action="store_true", help="Launch steering wheel controller (manual_control_steeringwheel.py)")
@@ -187,8 +226,7 @@ def connect(host: str, port: int, timeout: float) -> carla.Client:
     return client
 
 
-def list_maps(client: carla.Client, raw: bool = False) -> None:
-    maps = client.get_available_maps()
+def list_maps(maps: List[str], raw: bool = False) -> None:
     if raw:
         # Output raw map paths for scripting
         for town in maps:
@@ -200,6 +238,30 @@ def list_maps(client: carla.Client, raw: bool = False) -> None:
             print(f"  [{idx:02d}] {town}")
 
 
+def resolve_map_name(name: str, maps: List[str]) -> str:
+    """Resolve a full or partial map name against the server's map paths."""
+    # Try exact match first
+    if name in maps:
+        return name
+    # Then by basename (e.g., "Town04" -> "/Game/Carla/Maps/Town04"), which
+    # keeps "Town01" from colliding with "Town01_Opt"
+    by_basename: Dict[str, List[str]] = {}
+    for town in maps:
+        by_basename.setdefault(town.rsplit("/", 1)[-1], []).append(town)
+    matches = by_basename.get(name)
+    if matches is None:
+        # Fall back to any partial match
+        matches = [town for town in maps if name in town]
+    if len(matches) == 1:
+        return matches[0]
+    if len(matches) > 1:
+        print(f"Ambiguous map name '{name}'. Did you mean:")
+        for town in matches:
+            print(f"  {town}")
+        raise RuntimeError("Please specify the full map name")
+    raise RuntimeError(f"Unknown map '{name}'; run with --list-maps")
+
+
 def list_vehicles(world: carla.World, bp_filter: str) -> None:
     print(f"Vehicle blueprints matching '{bp_filter}':")
     for bp in world.get_blueprint_library().filter(bp_filter):
@@ -228,7 +290,22 @@ def find_vehicle(world: carla.World, role_name: str) -> Optional[carla.Vehicle]:
     return None
 
 
-def spawn_vehicle(world: carla.World, bp_id: str, role_name: str, spawn_idx: int, color: Optional[str]) -> carla.Vehicle:
+def spawn_vehicle(
+    client: carla.Client,
+    world: carla.World,
+    bp_id: str,
+    role_name: str,
+    spawn_idx: int,
+    color: Optional[str],
+    autopilot: Optional[bool] = None,
+    destroy: Iterable[carla.Actor] = (),
+) -> carla.Vehicle:
+    """Spawn a vehicle with one batched command list.
+
+    Destroying the actors in ``destroy``, spawning the vehicle and setting its
+    autopilot state share a single ``apply_batch_sync`` call. The blueprint
+    library, spawn points and the new actor are still fetched separately.
+    """
     bp_lib = world.get_blueprint_library()
     matches = bp_lib.filter(bp_id)
     if not matches:
@@ -239,52 +316,61 @@ def spawn_vehicle(world: carla.World, bp_id: str, role_name: str, spawn_idx: int
     if color and blueprint.has_attribute("color"):
         blueprint.set_attribute("color", color)
     transform = get_spawn_point(world, spawn_idx)
-    vehicle = world.try_spawn_actor(blueprint, transform)
+    spawn = carla.command.SpawnActor(blueprint, transform)
+    if autopilot is not None:
+        spawn = spawn.then(carla.command.SetAutopilot(carla.command.FutureActor, autopilot))
+    commands = [carla.command.DestroyActor(actor.id) for actor in destroy]
+    commands.append(spawn)
+    result = client.apply_batch_sync(commands, False)[-1]
+    if result.error:
+        raise RuntimeError(f"Failed to spawn vehicle ({result.error})")
+    vehicle = world.get_actor(result.actor_id)
     if vehicle is None:
-        raise RuntimeError("Failed to spawn vehicle (all spawn points occupied?)")
+        raise RuntimeError(f"Spawned actor {result.actor_id} is not visible to the client")
     print(f"Spawned {vehicle.type_id} at {transform.location}")
-    return vehicle
+    return vehicle  # type: ignore[return-value]
 
 
 def apply_weather(world: carla.World, preset: str) -> None:
-    weather = WEATHER_PRESETS[preset]
+    weather = weather_presets()[preset]
     world.set_weather(weather)
     print(f"Applied weather preset: {preset}")
 
 
 def set_view(world: carla.World, hero: Optional[carla.Vehicle], mode: str) -> None:
-    spectator = world.get_spectator()
-    if mode == "free" or hero is None:
-        spectator.set_transform(spectator.get_transform())
-        if hero is None and mode != "free":
-            print("[helper] No hero vehicle; spectator left unchanged")
+    if hero is None:
+        print("[helper] No hero vehicle; spectator left unchanged")
         return
+    spectator = world.get_spectator()
+    offset, pitch, yaw_delta = VIEW_OFFSETS[mode]
     transform = hero.get_transform()
-    if mode == "chase":
-        transform.location += carla.Location(x=-8, z=3)
-        transform.rotation.pitch = -10
-    elif mode == "front":
-        transform.location += carla.Location(x=8, z=2)
-        transform.rotation.yaw += 180
-        transform.rotation.pitch = -5
-    elif mode == "top":
-        transform.location += carla.Location(z=40)
-        transform.rotation.pitch = -90
+    transform.location += offset
+    transform.rotation.pitch = pitch
+    if yaw_delta:
+        transform.rotation.yaw += yaw_delta
     spectator.set_transform(transform)
     print(f"Moved spectator to {mode} view")
 
 
 @contextmanager
 def _maybe_override_wheel_config(config_path: Path):
+    """Install ``config_path`` as wheel_config.ini for the duration of the block.
+
+    Yields True when the original file has to be restored on exit.
+    """
     if not config_path.exists():
         raise RuntimeError(f"wheel config not found: {config_path}")
     target = EXAMPLES_DIR / "wheel_config.ini"
     backup_bytes: Optional[bytes] = None
     if target.exists():
+        if filecmp.cmp(config_path, target, shallow=False):
+            # Already in place; nothing to write now or restore afterwards
+            yield False
+            return
         backup_bytes = target.read_bytes()
-    target.write_bytes(config_path.read_bytes())
+    shutil.copyfile(config_path, target)
     try:
-        yield
+        yield True
     finally:
         if backup_bytes is None:
             try:
@@ -297,7 +383,7 @@ def _maybe_override_wheel_config(config_path: Path):
 
 @contextmanager
 def _noop_context():
-    yield
+    yield False
 
 
 def ensure_default_wheel_config() -> Path:
@@ -315,14 +401,13 @@ def run_manual_control(extra_args: Optional[List[str]], wheel: bool = False, whe
         script_path = EXAMPLES_DIR / "manual_control.py"
     if not script_path.exists():
         raise RuntimeError(f"{script_name} not found at {script_path}")
-    env = os.environ.copy()
-    # Find the CARLA egg file and add to PYTHONPATH
+    # Find the CARLA egg file and add to PYTHONPATH. The helper ends with manual
+    # control, so its own environment is extended in place rather than copied.
     egg_path = find_carla_egg()
-    if egg_path:
-        py_paths = [env.get("PYTHONPATH", ""), str(PY_API_SOURCE), str(egg_path)]
-    else:
-        py_paths = [env.get("PYTHONPATH", ""), str(PY_API_SOURCE), str(PY_API_DIST)]
-    env["PYTHONPATH"] = os.pathsep.join(filter(None, py_paths))
+    py_paths = [os.environ.get("PYTHONPATH", ""), str(PY_API_SOURCE), str(egg_path or PY_API_DIST)]
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, py_paths))
+    # Saves the wheel wrapper from resolving the project root again
+    os.environ["CARLA_MA_ROOT"] = str(PROJECT_ROOT)
     forwarded: List[str] = []
     if extra_args:
         forwarded = list(extra_args)
@@ -344,15 +429,21 @@ def run_manual_control(extra_args: Optional[List[str]], wheel: bool = False, whe
     cmd = [python_exe, str(script_path), *forwarded]
     cwd = str(EXAMPLES_DIR)
     msg = "manual_control_steeringwheel.py" if wheel else "manual_control.py"
-    print(f"[helper] Starting {msg}", " ".join(cmd))
+    print(f"[helper] Starting {msg}", " ".join(cmd), flush=True)
     context = _noop_context()
     if wheel:
         if wheel_config:
             context = _maybe_override_wheel_config(Path(wheel_config))
         else:
             context = _maybe_override_wheel_config(ensure_default_wheel_config())
-    with context:
-        subprocess.run(cmd, env=env, cwd=cwd, check=False)
+    with context as restore_pending:
+        if restore_pending:
+            # Stay alive so the original wheel_config.ini is put back afterwards
+            subprocess.run(cmd, cwd=cwd, check=False)
+        else:
+            # Nothing left to do after manual control; hand over this process
+            os.chdir(cwd)
+            os.execvp(cmd[0], cmd)
 
 
 def main() -> None:
@@ -361,56 +452,70 @@ def main() -> None:
         raise RuntimeError("--wheel-config requires --manual-wheel")
     client = connect(args.host, args.port, args.timeout)
 
+    # Fetched once and shared by --list-maps and --set-map
+    available_maps: List[str] = []
+    if args.list_maps or args.set_map:
+        available_maps = client.get_available_maps()
+
     if args.list_maps:
-        list_maps(client, args.raw)
+        list_maps(available_maps, args.raw)
 
-    world = client.get_world()
+    # Map listing and manual control never touch the world, so skip the RPC
+    # --view free leaves the spectator where it is: no world or hero needed
+    move_view = args.view not in (None, "free")
+    needs_world = any([
+        args.list_vehicles,
+        args.spawn,
+        args.respawn_hero,
+        args.autopilot,
+        args.weather,
+        move_view,
+    ])
+    world = client.get_world() if needs_world and not args.set_map else None
     if args.set_map:
-        available_maps = client.get_available_maps()
-        # Try exact match first
-        target_map = args.set_map
-        if target_map not in available_maps:
-            # Try to find by partial name (e.g., "Town04" -> "/Game/Carla/Maps/Town04")
-            matches = [m for m in available_maps if args.set_map in m]
-            if len(matches) == 1:
-                target_map = matches[0]
-            elif len(matches) > 1:
-                print(f"Ambiguous map name '{args.set_map}'. Did you mean:")
-                for m in matches:
-                    print(f"  {m}")
-                raise RuntimeError("Please specify the full map name")
-            else:
-                raise RuntimeError(f"Unknown map '{args.set_map}'; run with --list-maps")
-
+        target_map = resolve_map_name(args.set_map, available_maps)
         print(f"Loading map: {target_map}")
         world = client.load_world(target_map)
-        time.sleep(2.0)
+        try:
+            # Returns as soon as the server ticks on the new map
+            world.wait_for_tick(args.timeout)
+        except RuntimeError:
+            # No tick within the timeout (e.g. synchronous mode); settle briefly
+            time.sleep(1.0)
         print(f"Map loaded successfully")
 
     if args.list_vehicles:
         list_vehicles(world, args.vehicle_filter)
 
-    hero = None
+    stale: List[carla.Actor] = []
     if args.respawn_hero:
-        hero = find_vehicle(world, args.role_name)
-        if hero:
-            print(f"Destroying existing {args.role_name} ({hero.type_id})")
-            destroy_actor(hero)
-            hero = None
+        old_hero = find_vehicle(world, args.role_name)
+        if old_hero:
+            print(f"Destroying existing {args.role_name} ({old_hero.type_id})")
+            stale.append(old_hero)
 
+    hero = None
+    autopilot = None if args.autopilot is None else args.autopilot == "on"
     if args.spawn:
-        hero = spawn_vehicle(world, args.spawn, args.role_name, args.spawn_index, args.spawn_color)
+        # Destroy, spawn and autopilot go to the server as one batch
+        hero = spawn_vehicle(
+            client, world, args.spawn, args.role_name, args.spawn_index, args.spawn_color, autopilot, stale
+        )
     else:
-        hero = find_vehicle(world, args.role_name)
+        for actor in stale:
+            destroy_actor(actor)
+        if autopilot is not None or move_view:
+            hero = find_vehicle(world, args.role_name)
+        if autopilot is not None and hero:
+            hero.set_autopilot(autopilot)
 
-    if args.autopilot and hero:
-        hero.set_autopilot(args.autopilot == "on")
-        print(f"Autopilot {'enabled' if args.autopilot == 'on' else 'disabled'} for {hero.type_id}")
+    if autopilot is not None and hero:
+        print(f"Autopilot {'enabled' if autopilot else 'disabled'} for {hero.type_id}")
 
     if args.weather:
         apply_weather(world, args.weather)
 
-    if args.view:
+    if move_view:
         set_view(world, hero, args.view)
 
     if args.manual or args.manual_wheel:
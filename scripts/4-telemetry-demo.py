@@ -1,6 +1,7 @@
 #!/usr/bin/env python3.7
 """Simple CARLA telemetry demo: prints vehicle pose and control each tick."""
 
+import re
 import sys
 import time
 from pathlib import Path
@@ -9,8 +10,15 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 CARLA_ROOT = PROJECT_ROOT / "local_carla"
 EGG_DIR = CARLA_ROOT / "PythonAPI" / "carla" / "dist"
 
+
+def egg_version(egg_path: Path) -> tuple:
+    """Release number of a carla-X.Y.Z egg, so 0.9.10 ranks above 0.9.9."""
+    match = re.match(r"carla-(\d+(?:\.\d+)*)", egg_path.name)
+    return tuple(int(part) for part in match.group(1).split(".")) if match else ()
+
+
 try:
-    egg = max(EGG_DIR.glob("carla-*.egg"))
+    egg = max(EGG_DIR.glob("carla-*.egg"), key=egg_version)
 except ValueError:
     sys.exit("CARLA egg not found; run scripts/1-setup-carla.sh")
 
@@ -24,7 +32,7 @@ world = client.get_world()
 vehicle = None
 actors = world.get_actors().filter("vehicle.*")
 for actor in actors:
-    if actor.attributes.get("role_name") == "hero" or "tesla" in actor.type_id:
+    if "tesla" in actor.type_id or actor.attributes.get("role_name") == "hero":
         vehicle = actor
         break
 
@@ -34,27 +42,42 @@ if vehicle is None:
 if vehicle is None:
     sys.exit("No vehicle found in simulation")
 
-print(f"Tracking {vehicle.type_id} (id={vehicle.id})")
+print(f"Tracking {vehicle.type_id} (id={vehicle.id})", flush=True)
 
 last_time = time.time()
 
+# Tick lines go through a private buffer flushed every FLUSH_EVERY ticks rather
+# than a line-buffered print() (one write syscall per tick) from the callback.
+FLUSH_EVERY = 20
+out = open(sys.stdout.fileno(), "wb", buffering=64 * 1024, closefd=False)
+tick_count = 0
+
 def on_tick(snapshot: carla.WorldSnapshot) -> None:
-    global last_time
-    transform = vehicle.get_transform()
-    velocity = vehicle.get_velocity()
+    global last_time, tick_count
+    # Transform and velocity come with the tick's snapshot; only the control
+    # state needs a call on the actor
+    actor_snapshot = snapshot.find(vehicle.id)
+    if actor_snapshot is None:
+        return
+    transform = actor_snapshot.get_transform()
+    velocity = actor_snapshot.get_velocity()
     control = vehicle.get_control()
     now = time.time()
     dt = now - last_time
     last_time = now
-    print(
+    line = (
         f"frame={snapshot.frame:>6} | t={snapshot.timestamp.platform_timestamp:6.2f}s | "
         f"pos=({transform.location.x:7.2f}, {transform.location.y:7.2f}, {transform.location.z:5.2f}) | "
         f"speed={3.6 * (velocity.length()):6.2f} km/h | "
-        f"ctrl(thr={control.throttle:.2f}, brk={control.brake:.2f}, steer={control.steer:.2f}, gear={control.gear})"
+        f"ctrl(thr={control.throttle:.2f}, brk={control.brake:.2f}, steer={control.steer:.2f}, gear={control.gear})\n"
     )
+    out.write(line.encode())
+    tick_count += 1
+    if tick_count % FLUSH_EVERY == 0:
+        out.flush()
 
 world.on_tick(on_tick)
-print("Press Ctrl+C to stop...")
+print("Press Ctrl+C to stop...", flush=True)
 try:
     while True:
         time.sleep(1)
@@ -62,3 +85,4 @@ except KeyboardInterrupt:
     pass
 finally:
     world.remove_on_tick(on_tick)
+    out.flush()
@@ -3,20 +3,62 @@
 
 from __future__ import annotations
 
+import importlib.machinery
 import importlib.util
+import marshal
+import os
 import sys
+import types
 from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# 3-carla-helper.py exports the project root it already resolved
+PROJECT_ROOT = Path(os.environ.get("CARLA_MA_ROOT") or Path(__file__).resolve().parents[1])
 EXAMPLES_DIR = PROJECT_ROOT / "local_carla" / "PythonAPI" / "examples"
 BASE_SCRIPT = EXAMPLES_DIR / "manual_control_steeringwheel.py"
 
 
+class UserCacheLoader(importlib.machinery.SourceFileLoader):
+    """Source loader for a read-only examples directory (e.g. bind-mounted CARLA).
+
+    A current __pycache__ entry, such as the one 1-setup-carla.sh precompiles,
+    is used as usual. When it is missing or stale, __pycache__ cannot be
+    rewritten, so the compiled code is kept under $XDG_CACHE_HOME/carla-multiarch
+    instead of recompiling the base script on every launch.
+    """
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        # Only reached when __pycache__ has no current entry for the script
+        try:
+            cache_root = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        except (KeyError, RuntimeError):
+            # No HOME and no passwd entry (e.g. docker --user): compile uncached
+            return super().source_to_code(data, path, _optimize=_optimize)
+        cache_path = cache_root / "carla-multiarch" / f"{self.name}.{sys.implementation.cache_tag}.pyc"
+        header = importlib.util.MAGIC_NUMBER + importlib.util.source_hash(data)
+        try:
+            cached = cache_path.read_bytes()
+            if cached.startswith(header):
+                return marshal.loads(cached[len(header):])
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        code = super().source_to_code(data, path, _optimize=_optimize)
+        if not sys.dont_write_bytecode:
+            # set_data creates the directory and writes atomically, so
+            # concurrent launches never see a truncated cache file
+            self.set_data(str(cache_path), header + marshal.dumps(code))
+        return code
+
+
 def load_base_module():
     if not BASE_SCRIPT.exists():
         print(f"manual_control_steeringwheel.py not found at {BASE_SCRIPT}", file=sys.stderr)
         sys.exit(2)
-    spec = importlib.util.spec_from_file_location("manual_control_steeringwheel", BASE_SCRIPT)
+    if os.access(EXAMPLES_DIR, os.W_OK):
+        loader_class = importlib.machinery.SourceFileLoader
+    else:
+        loader_class = UserCacheLoader
+    loader = loader_class("manual_control_steeringwheel", str(BASE_SCRIPT))
+    spec = importlib.util.spec_from_file_location(loader.name, BASE_SCRIPT, loader=loader)
     module = importlib.util.module_from_spec(spec)
     sys.modules[spec.name] = module
     assert spec.loader is not None
@@ -27,6 +69,8 @@ def load_base_module():
 def patch_dual_control(module):
     carla = module.carla
     pygame = module.pygame
+    # Resolved once rather than through super() on every frame
+    base_parse_vehicle_wheel = module.DualControl._parse_vehicle_wheel
 
     class DualControlWithShifter(module.DualControl):  # type: ignore[misc]
         def __init__(self, *args, **kwargs):
@@ -43,25 +87,43 @@ def patch_dual_control(module):
                 if not self._parser.has_section(section):
                     continue
 
-                self._shifter_index = self._parser.getint(section, "device_index", fallback=-1)
-                self._shifter_name = self._parser.get(section, "device_name", fallback="Driving Force Shifter")
-                self._shifter_mapping = {
-                    self._parser.getint(section, "gear1", fallback=-1): 1,
-                    self._parser.getint(section, "gear2", fallback=-1): 2,
-                    self._parser.getint(section, "gear3", fallback=-1): 3,
-                    self._parser.getint(section, "gear4", fallback=-1): 4,
-                    self._parser.getint(section, "gear5", fallback=-1): 5,
-                    self._parser.getint(section, "gear6", fallback=-1): 6,
-                }
-                self._shifter_mapping = {
-                    btn: gear for btn, gear in self._shifter_mapping.items() if btn >= 0
-                }
-                reverse_btn = self._parser.getint(section, "reverse", fallback=-1)
+                # Read the section once instead of one getint() lookup per key
+                options = dict(self._parser.items(section))
+                self._shifter_index = int(options.get("device_index", -1))
+                self._shifter_name = options.get("device_name", "Driving Force Shifter")
+                mapping = {int(options.get(f"gear{gear}", -1)): gear for gear in range(1, 7)}
+                self._shifter_mapping = {btn: gear for btn, gear in mapping.items() if btn >= 0}
+                reverse_btn = int(options.get("reverse", -1))
                 self._shifter_reverse = reverse_btn if reverse_btn >= 0 else None
                 break
 
             self._select_shifter_device()
+            device = self._shifter_device
+            self._get_button = device.get_button
+            # Drop buttons the device does not have, so the per-frame reads
+            # need no bounds checks
+            button_count = device.get_numbuttons()
+            gear_buttons = [btn for btn in self._shifter_mapping if btn < button_count]
+            if self._shifter_reverse is not None and self._shifter_reverse >= button_count:
+                self._shifter_reverse = None
+            # Each frame only these buttons are read, packed into an int bitmask.
+            # Bits follow the mapping's gear order rather than button numbers,
+            # so the lowest set bit is always the lowest pressed gear.
+            polled = [(btn, 1 << rank) for rank, btn in enumerate(gear_buttons)]
+            self._gear_by_bit = {bit: self._shifter_mapping[btn] for btn, bit in polled}
+            self._gear_mask = (1 << len(polled)) - 1
+            self._reverse_bit = 0
+            if self._shifter_reverse is not None:
+                self._reverse_bit = 1 << len(polled)
+                polled.append((self._shifter_reverse, self._reverse_bit))
+            self._polled_buttons = tuple(polled)
+            self._pressed_buttons = 0
+            self._shifter_gear = None
             self._force_manual_mode()
+            if not self._shifter_mapping:
+                # No shifter gears configured: skip the per-frame shifter work
+                # and parse the wheel exactly like DualControl
+                self._parse_vehicle_wheel = types.MethodType(base_parse_vehicle_wheel, self)
 
         def _select_shifter_device(self):
             if self._shifter_index is None and self._shifter_name is None:
@@ -69,55 +131,66 @@ def patch_dual_control(module):
 
             preferred_idx = self._shifter_index if self._shifter_index is not None else -1
             preferred_name = (self._shifter_name or "").lower()
+            base_id = self._joystick.get_id()
+            joysticks = [pygame.joystick.Joystick(idx) for idx in range(pygame.joystick.get_count())]
 
-            for idx in range(pygame.joystick.get_count()):
-                js = pygame.joystick.Joystick(idx)
-                name = js.get_name().lower()
-                if preferred_idx >= 0 and idx == preferred_idx:
-                    self._shifter_device = js
-                    if js.get_id() != self._joystick.get_id():
-                        js.init()
-                    return
-                if preferred_name and preferred_name in name:
-                    self._shifter_device = js
-                    if js.get_id() != self._joystick.get_id():
-                        js.init()
-                    return
-            # fallback: if a second joystick exists, use it
-            if pygame.joystick.get_count() > 1 and self._shifter_device == self._joystick:
-                js = pygame.joystick.Joystick(1)
-                if js.get_id() != self._joystick.get_id():
+            def adopt(js):
+                # The wheel itself is already initialized by DualControl
+                if js.get_id() != base_id:
                     js.init()
                 self._shifter_device = js
 
+            for idx, js in enumerate(joysticks):
+                if (preferred_idx >= 0 and idx == preferred_idx) or (
+                    preferred_name and preferred_name in js.get_name().lower()
+                ):
+                    adopt(js)
+                    return
+            # fallback: if a second joystick exists, use it
+            if len(joysticks) > 1 and self._shifter_device == self._joystick:
+                adopt(joysticks[1])
+
         def _force_manual_mode(self):
             if isinstance(self._control, carla.VehicleControl):
                 self._control.manual_gear_shift = True
                 if self._control.gear == 0:
                     self._control.gear = 1
 
-        def _apply_shifter(self, button_states):
-            if not self._shifter_mapping:
-                return
-            gear = None
-            for btn, gear_value in self._shifter_mapping.items():
-                if btn < len(button_states) and button_states[btn]:
-                    gear = gear_value
-                    break
-            if gear is None and self._shifter_reverse is not None:
-                if self._shifter_reverse < len(button_states) and button_states[self._shifter_reverse]:
+        def _apply_shifter(self, pressed):
+            # The shifter sits in one gear for long stretches: only decode the
+            # gear again when the pressed buttons changed since the last frame
+            if pressed == self._pressed_buttons:
+                gear = self._shifter_gear
+            else:
+                self._pressed_buttons = pressed
+                gear_bits = pressed & self._gear_mask
+                if gear_bits:
+                    # Lowest set bit, i.e. the lowest pressed gear
+                    gear = self._gear_by_bit[gear_bits & -gear_bits]
+                elif pressed & self._reverse_bit:
                     gear = -1
+                else:
+                    gear = None
+                self._shifter_gear = gear
             if gear is None:
                 return
-            if isinstance(self._control, carla.VehicleControl):
-                self._control.manual_gear_shift = True
-                self._control.gear = gear
+            # DualControl only polls the wheel while driving a vehicle, so this is
+            # always a carla.VehicleControl. Write only on change; the keyboard
+            # 'M' toggle can clear manual mode.
+            control = self._control
+            if not control.manual_gear_shift:
+                control.manual_gear_shift = True
+            if control.gear != gear:
+                control.gear = gear
 
         def _parse_vehicle_wheel(self):
-            super()._parse_vehicle_wheel()
-            js = self._shifter_device or self._joystick
-            button_states = [bool(js.get_button(i)) for i in range(js.get_numbuttons())]
-            self._apply_shifter(button_states)
+            base_parse_vehicle_wheel(self)
+            get_button = self._get_button
+            pressed = 0
+            for btn, bit in self._polled_buttons:
+                if get_button(btn):
+                    pressed |= bit
+            self._apply_shifter(pressed)
 
     module.DualControl = DualControlWithShifter
 